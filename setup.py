@@ -10,6 +10,7 @@ setup(name='slotmachine',
       packages=['slotmachine'],
       install_requires=['PuLP==2.1',
                         'python-dateutil>=2.5.3'],
+      extras_require={'fast': ['numpy', 'scipy>=1.9', 'orjson']},
       license='MIT License',
       zip_safe=False,
       keywords='',
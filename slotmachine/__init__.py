@@ -1,13 +1,36 @@
 from __future__ import annotations
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from dateutil import parser, relativedelta
+from functools import lru_cache
 from typing import Iterable
+import hashlib
 import json
+import os
+import pickle
 import time
 import logging
 import pulp
 
+# NumPy/SciPy are optional: when present we assemble the model as sparse
+# matrices and solve with HiGHS (scipy.optimize.milp), which avoids building
+# millions of PuLP objects. Without them we fall back to the PuLP model.
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy import optimize as scipy_optimize
+except ImportError:
+    np = None
+
+HAVE_MILP = np is not None and hasattr(scipy_optimize, "milp")
+
+# orjson parses and serialises schedule files much faster than the stdlib;
+# fall back to json when it isn't installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class Unsatisfiable(Exception):
     pass
@@ -21,156 +44,789 @@ class SlotMachine(object):
     # If preferred venues and/or slots are not specified, assume there are no preferences
     Talk.__new__.__defaults__ = ([], [])
 
-    def __init__(self):
+    def __init__(self, cache_dir=None, solver=None):
         self.log = logging.getLogger(__name__)
+        # A PuLP solver to use for every schedule_talks call, for callers
+        # licensed for Gurobi/CPLEX etc. Forces the PuLP model path.
+        self.solver = solver
         self.talks_by_id = {}
         self.talk_permissions = {}
         self.slots_available = set()
-        self.var_cache: dict[str, pulp.LpVariable] = {}
+        self.var_cache: dict[tuple, pulp.LpVariable] = {}
+        self.expr_cache: dict[tuple, pulp.LpAffineExpression] = {}
+        self._vars_by_talk: dict[int, list[pulp.LpVariable]] = defaultdict(list)
+        self._usable_masks: dict[int, int] = {}
+        # Built matrices keyed by a hash of the inputs, so re-solving after a
+        # small edit (or with different solver settings) skips the model build.
+        # Pass cache_dir to also persist them across runs.
+        self._model_cache: dict[str, tuple] = {}
+        self.cache_dir = cache_dir
+
+    def usable_slot_mask(self, talk_id) -> int:
+        """Bitmask of the talk's usable (available and permitted) slots."""
+        mask = self._usable_masks.get(talk_id)
+        if mask is None:
+            mask = 0
+            available = set(self.slots_available)
+            for s in self.talk_permissions[talk_id]["slots"]:
+                if s in available:
+                    mask |= 1 << s
+            self._usable_masks[talk_id] = mask
+        return mask
+
+    def window_fits(self, slot, talk_id) -> bool:
+        """Whether the talk can occupy all its slots starting from this one.
+
+        A single AND against the talk's usable-slot bitmask checks the whole
+        window at once."""
+        if slot < 0:
+            # A stale old schedule can reference slots before the current
+            # time ranges
+            return False
+        duration = self.talks_by_id[talk_id].duration
+        window = ((1 << duration) - 1) << slot
+        return self.usable_slot_mask(talk_id) & window == window
 
-    def start_var(self, slot, talk_id, venue) -> pulp.LpVariable:
+    def start_var(self, slot, talk_id, venue) -> pulp.LpVariable | int:
         """A 0/1 variable that is 1 if talk with ID talk_id begins in this
-        slot and venue"""
-        name = "B_%d_%d_%d" % (slot, talk_id, venue)
-        if name in self.var_cache:
-            return self.var_cache[name]
-
-        # Check if this talk doesn't span a period of no talks
-        contiguous = True
-        for slot_offset in range(0, self.talks_by_id[talk_id].duration):
-            if slot + slot_offset not in self.slots_available:
-                contiguous = False
-                break
-
-        # There isn't enough time left for the talk if it starts in this slot.
-        if not contiguous:
-            var = pulp.LpVariable(name, lowBound=0, upBound=0, cat="Integer")
+        slot and venue, or the constant 0 where that's impossible"""
+        key = (slot, talk_id, venue)
+        if key in self.var_cache:
+            return self.var_cache[key]
+
+        # The talk must be allowed in the venue, and must fit its permitted
+        # slots from here without spanning a period of no talks
+        feasible = venue in self.talk_permissions[talk_id][
+            "venues"
+        ] and self.window_fits(slot, talk_id)
+
+        # The talk can't be scheduled here at all: return a constant 0 so the
+        # cell drops out of sums entirely, rather than a variable pinned to 0
+        # that the model (and presolve) still has to carry.
+        if not feasible:
+            var = 0
         else:
-            var = pulp.LpVariable(name, cat="Binary")
+            # Only build the (much slower to hash) name string on a cache
+            # miss, when PuLP actually needs it.
+            var = pulp.LpVariable("B_%d_%d_%d" % key, cat="Binary")
 
-        self.var_cache[name] = var
+        self.var_cache[key] = var
         return var
 
-    def active(self, slot, talk_id, venue) -> pulp.LpVariable:
-        """A 0/1 variable that is 1 if talk with ID talk_id is active during
-        this slot and venue"""
-        name = "A_%d_%d_%d" % (slot, talk_id, venue)
-        if name in self.var_cache:
-            return self.var_cache[name]
-
-        if (
-            slot in self.talk_permissions[talk_id]["slots"]
-            and venue in self.talk_permissions[talk_id]["venues"]
-        ):
-            variable = pulp.LpVariable(name, cat="Binary")
-        else:
-            variable = pulp.LpVariable(name, lowBound=0, upBound=0, cat="Integer")
+    def active_expr(self, slot, talk_id, venue) -> pulp.LpAffineExpression:
+        """An expression that is 1 if talk with ID talk_id is active during
+        this slot and venue: the sum of its start variables that would cover
+        the slot. Substituting this directly instead of defining an auxiliary
+        variable halves the model's variable and row count."""
+        key = (slot, talk_id, venue)
+        if key in self.expr_cache:
+            return self.expr_cache[key]
 
         duration = self.talks_by_id[talk_id].duration
-        definition = pulp.lpSum(
+        expr = pulp.lpSum(
             self.start_var(s, talk_id, venue)
             for s in range(slot, max(-1, slot - duration), -1)
         )
 
-        self.problem.addConstraint(variable == definition)
-        self.var_cache[name] = variable
-        return variable
+        self.expr_cache[key] = expr
+        return expr
+
+    def _prebuild_variables(self, venues, talks: Iterable[Talk]):
+        """Populate var_cache for every feasible cell in one pass.
+
+        Which start slots fit is venue-independent, so work it out once per
+        talk and reuse it across venues rather than re-checking the window
+        for each (slot, talk, venue) cell as start_var gets called."""
+        slots = sorted(self.slots_available)
+        self._vars_by_talk = defaultdict(list)
+        for talk in talks:
+            feasible_slots = [s for s in slots if self.window_fits(s, talk.id)]
+            for venue in sorted(self.talk_permissions[talk.id]["venues"]):
+                if venue not in venues:
+                    continue
+                for slot in feasible_slots:
+                    key = (slot, talk.id, venue)
+                    var = pulp.LpVariable("B_%d_%d_%d" % key, cat="Binary")
+                    self.var_cache[key] = var
+                    self._vars_by_talk[talk.id].append(var)
 
     def get_problem(self, venues, talks: Iterable[Talk], old_talks) -> pulp.LpProblem:
         # Reset problem and cached variables
         self.problem = pulp.LpProblem("Scheduler", pulp.LpMaximize)
         self.var_cache = {}
+        self.expr_cache = {}
+        self._usable_masks = {}
 
         self.talks_by_id = {talk.id: talk for talk in talks}
+        # Sort the slots once: set iteration order varies between runs, and a
+        # deterministic model (same rows, same order) means reproducible
+        # solver behaviour
+        slots_sorted = sorted(self.slots_available)
+        self._prebuild_variables(venues, talks)
 
-        # Every talk begins exactly once
+        self._check_placeable(talks, set(self._vars_by_talk))
+
+        # Which talks can actually use each venue; constraints below only
+        # iterate these pairs rather than the full talk x venue product
+        talks_by_venue = defaultdict(list)
         for talk in talks:
-            self.problem.addConstraint(
-                pulp.lpSum(
-                    self.start_var(slot, talk.id, venue)
-                    for venue in venues
-                    for slot in self.slots_available
+            for venue in self.talk_permissions[talk.id]["venues"]:
+                if venue in venues:
+                    talks_by_venue[venue].append(talk)
+
+        # Every talk begins exactly once. Building the (variable, coefficient)
+        # list and handing it to LpAffineExpression in one go skips lpSum's
+        # per-term expression arithmetic, and named constraints make solver
+        # logs legible.
+        for talk in talks:
+            self.problem += (
+                pulp.LpAffineExpression(
+                    [(var, 1) for var in self._vars_by_talk[talk.id]]
                 )
-                == 1
+                == 1,
+                "once_%s" % talk.id,
             )
 
-        # At most one talk may be active in a given venue and slot.
+        # At most one talk may be active in a given venue and slot. Cells no
+        # talk can reach, or that only one start variable covers, give rows
+        # that are already implied by the variable bounds — don't post them.
         for v in venues:
-            for slot in self.slots_available:
-                self.problem.addConstraint(
-                    pulp.lpSum(self.active(slot, talk.id, v) for talk in talks) <= 1
+            for slot in slots_sorted:
+                terms = [
+                    (var, 1)
+                    for talk in talks_by_venue[v]
+                    for var in self.active_expr(slot, talk.id, v).keys()
+                ]
+                if len(terms) < 2:
+                    continue
+                self.problem += (
+                    pulp.LpAffineExpression(terms) <= 1,
+                    "cap_%s_%s" % (v, slot),
                 )
 
+        # Symmetry-breaking cuts: interchangeable venues must carry
+        # non-increasing total scheduled time, so the solver doesn't branch
+        # on permutations of the same schedule. Skipped when an old schedule
+        # anchors talks to venues.
+        if not old_talks:
+            groups = self.interchangeable_venue_groups(venues, talks)
+            if groups:
+                load_terms = defaultdict(list)
+                for (slot, talk_id, venue), var in self.var_cache.items():
+                    if not isinstance(var, int):
+                        load_terms[venue].append(
+                            (var, self.talks_by_id[talk_id].duration)
+                        )
+                for group in groups:
+                    for v1, v2 in zip(group, group[1:]):
+                        self.problem += (
+                            pulp.LpAffineExpression(load_terms[v1])
+                            >= pulp.LpAffineExpression(load_terms[v2]),
+                            "sym_%s_%s" % (v1, v2),
+                        )
+
+            # Likewise, indistinguishable talks by the same speaker must run
+            # in id order so the solver doesn't branch on their permutations.
+            chains = self.identical_talk_chains(talks)
+            if chains:
+                start_terms = defaultdict(list)
+                for (slot, talk_id, venue), var in self.var_cache.items():
+                    if not isinstance(var, int):
+                        start_terms[talk_id].append((var, slot))
+                for chain in chains:
+                    for t1, t2 in zip(chain, chain[1:]):
+                        self.problem += (
+                            pulp.LpAffineExpression(start_terms[t1])
+                            <= pulp.LpAffineExpression(start_terms[t2]),
+                            "ord_%s_%s" % (t1, t2),
+                        )
+
+        def weighted(exprs, weight):
+            # Accumulate each term's coefficients into one dict and build a
+            # single LpAffineExpression, instead of lpSum's per-term
+            # expression arithmetic
+            coeffs: dict[pulp.LpVariable, int] = defaultdict(int)
+            for expr in exprs:
+                for var in expr:
+                    coeffs[var] += weight
+            return pulp.LpAffineExpression(coeffs)
+
         self.problem += (
-            5
-            * pulp.lpSum(
+            weighted(
                 # Maximise the number of things in their preferred venues (for putting big talks on big stages)
-                self.active(slot, talk.id, venue)
-                for talk in talks
-                for venue in talk.preferred_venues
-                for slot in self.slots_available
+                (
+                    self.active_expr(slot, talk.id, venue)
+                    for talk in talks
+                    for venue in talk.preferred_venues
+                    for slot in slots_sorted
+                ),
+                5,
             )
-            + 10
-            * pulp.lpSum(
+            + weighted(
                 # Try and keep everything inside its preferred time period (for packing things earlier in the day)
-                self.active(slot, talk.id, venue)
-                for talk in talks
-                for slot in talk.preferred_slots
-                for venue in venues
+                (
+                    self.active_expr(slot, talk.id, venue)
+                    for talk in talks
+                    for slot in talk.preferred_slots
+                    for venue in venues
+                ),
+                10,
             )
-            + 10
-            * pulp.lpSum(
-                # We'd like talks with a slot & venue to try and stay there if they can
-                self.active(s, talk_id, venue)
-                for (slot, talk_id, venue) in old_talks
-                for s in range(slot, slot + self.talks_by_id[talk_id].duration)
+            + self._old_talks_objective(old_talks)
+        )
+
+        # For each talk by the same speaker it can only be active in at most one
+        # talk slot at the same time.
+        for group, conflicts in enumerate(self.conflict_groups(talks)):
+            for slot in slots_sorted:
+                terms = [
+                    (var, 1)
+                    for talk_id in conflicts
+                    for venue in self.talk_permissions[talk_id]["venues"]
+                    if venue in venues
+                    for var in self.active_expr(slot, talk_id, venue).keys()
+                ]
+                if len(terms) < 2:
+                    continue
+                self.problem += (
+                    pulp.LpAffineExpression(terms) <= 1,
+                    "spk_%s_%s" % (group, slot),
+                )
+        return self.problem
+
+    def _old_talks_objective(self, old_talks):
+        """Build the stability objective in a single pass over old_talks.
+
+        For each previous placement we weight the active cells of the
+        original slot & venue (+10), the original slot in any allowed
+        venue (+5), and a 60-minute window either side in any allowed
+        venue (+1), accumulating per-cell weights before touching any
+        variables so each cell is expanded at most once."""
+        cell_weight: dict[tuple, int] = defaultdict(int)
+        for (slot, talk_id, venue) in old_talks:
+            duration = self.talks_by_id[talk_id].duration
+            for s in range(slot, slot + duration):
+                # We'd like talks with a slot & venue to try and stay there
+                cell_weight[(s, talk_id, venue)] += 10
+            for v in self.talk_permissions[talk_id]["venues"]:
+                for s in range(slot, slot + duration):
+                    # And we'd prefer to just move stage rather than slot
+                    cell_weight[(s, talk_id, v)] += 5
+                for s in range(slot - 6, slot + duration + 6):
+                    # But if they have to move slot, 60mins either way is ok
+                    cell_weight[(s, talk_id, v)] += 1
+
+        coeffs: dict[pulp.LpVariable, int] = defaultdict(int)
+        for (s, talk_id, v), weight in cell_weight.items():
+            # The ±6-slot window can reach outside the schedule entirely;
+            # don't bother expanding cells that can never be active.
+            if s not in self.slots_available:
+                continue
+            for var in self.active_expr(s, talk_id, v):
+                coeffs[var] += weight
+        return pulp.LpAffineExpression(coeffs)
+
+    def _check_placeable(self, talks: Iterable[Talk], placeable: set):
+        """Raise Unsatisfiable up front for any talk with no feasible
+        placement at all, rather than handing the solver a trivially
+        infeasible model and waiting for it to notice."""
+        for talk in talks:
+            if talk.id not in placeable:
+                self.log.warning("Talk %s has no feasible slot and venue", talk.id)
+                raise Unsatisfiable()
+
+    def _forced_schedule(self, venues, talks: Iterable[Talk]):
+        """The schedule, if constraint propagation alone determines it.
+
+        A talk with a single feasible (slot, venue) must go there, and fixing
+        it removes options from talks sharing its venue or a speaker. When
+        that cascades until every talk is pinned, the result is the unique
+        feasible schedule and there's nothing for a solver to do. Returns
+        None as soon as any talk keeps a choice open."""
+        slots = sorted(self.slots_available)
+        options: dict[int, list[tuple[int, int]]] = {}
+        for talk in talks:
+            feasible_slots = [s for s in slots if self.window_fits(s, talk.id)]
+            options[talk.id] = [
+                (slot, venue)
+                for venue in sorted(
+                    v for v in self.talk_permissions[talk.id]["venues"] if v in venues
+                )
+                for slot in feasible_slots
+            ]
+
+        conflicts_of: dict[int, set] = defaultdict(set)
+        for group in self.conflict_groups(talks):
+            for talk_id in group:
+                conflicts_of[talk_id].update(group)
+
+        fixed: dict[int, tuple[int, int]] = {}
+        while True:
+            tid = next(
+                (t for t, opts in options.items() if t not in fixed and len(opts) == 1),
+                None,
             )
-            + 5
-            * pulp.lpSum(
-                # And we'd prefer to just move stage rather than slot
-                self.active(s, talk_id, v)
-                for (slot, talk_id, _) in old_talks
-                for s in range(slot, slot + self.talks_by_id[talk_id].duration)
-                for v in self.talk_permissions[talk_id]["venues"]
+            if tid is None:
+                break
+            slot, venue = options[tid][0]
+            fixed[tid] = (slot, venue)
+            end = slot + self.talks_by_id[tid].duration
+            for other, opts in options.items():
+                if other in fixed:
+                    continue
+                duration = self.talks_by_id[other].duration
+                opts[:] = [
+                    (s, v)
+                    for s, v in opts
+                    if s >= end
+                    or s + duration <= slot
+                    or (v != venue and other not in conflicts_of[tid])
+                ]
+                if not opts:
+                    # The forced placement was mandatory, so this clash
+                    # can't be scheduled around
+                    self.log.warning(
+                        "Talk %s has no feasible placement left after "
+                        "fixing talk %s",
+                        other,
+                        tid,
+                    )
+                    raise Unsatisfiable()
+
+        if options and len(fixed) == len(options):
+            return sorted((slot, tid, venue) for tid, (slot, venue) in fixed.items())
+        return None
+
+    def interchangeable_venue_groups(self, venues, talks: Iterable[Talk]):
+        """Groups of venues the model can't tell apart: the same talks may
+        use them and the same talks prefer them.
+
+        CBC explores symmetric venue assignments as distinct branches, so for
+        each group we order the venues by total scheduled time to cut the
+        permuted duplicates out of the tree. Only safe when there's no old
+        schedule, since old_talks anchors talks to specific venues."""
+        groups = defaultdict(list)
+        for venue in venues:
+            allowed = frozenset(
+                talk.id
+                for talk in talks
+                if venue in self.talk_permissions[talk.id]["venues"]
             )
-            + 1
-            * pulp.lpSum(
-                # But if they have to move slot, 60mins either way is ok
-                self.active(s, talk_id, v)
-                for (slot, talk_id, _) in old_talks
-                for s in range(slot - 6, slot + self.talks_by_id[talk_id].duration + 6)
-                for v in self.talk_permissions[talk_id]["venues"]
+            preferred = frozenset(
+                talk.id for talk in talks if venue in talk.preferred_venues
             )
-        )
+            groups[(allowed, preferred)].append(venue)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+    @staticmethod
+    def conflict_groups(talks: Iterable[Talk]) -> list[list[int]]:
+        """Groups of talks that share a speaker and so may not overlap.
 
-        talks_by_speaker: dict[str, list[int]] = {}
+        Speakers with a single talk can't conflict with themselves and are
+        dropped here rather than in the constraint loops."""
+        talks_by_speaker: dict[str, list[int]] = defaultdict(list)
         for talk in talks:
             for speaker in talk.speakers:
-                talks_by_speaker.setdefault(speaker, []).append(talk.id)
+                talks_by_speaker[speaker].append(talk.id)
+        return [c for c in talks_by_speaker.values() if len(c) > 1]
+
+    def identical_talk_chains(self, talks: Iterable[Talk]) -> list[list[int]]:
+        """Groups of same-speaker talks the model can't tell apart: identical
+        duration, permissions and preferences.
+
+        Swapping two such talks yields the same schedule with a different
+        labelling, so each group is ordered by id and constrained to start in
+        non-decreasing slots. The speaker sets must match exactly: a talk
+        with an extra speaker carries extra conflict constraints, so it's not
+        interchangeable with one that merely shares a speaker. Only safe when
+        there's no old schedule, since old_talks anchors specific talk ids to
+        slots."""
+        groups = defaultdict(list)
+        for talk in talks:
+            groups[
+                (
+                    frozenset(talk.speakers),
+                    talk.duration,
+                    frozenset(self.talk_permissions[talk.id]["venues"]),
+                    frozenset(self.talk_permissions[talk.id]["slots"]),
+                    frozenset(talk.preferred_venues),
+                    frozenset(talk.preferred_slots),
+                )
+            ].append(talk.id)
+        return sorted(sorted(c) for c in groups.values() if len(c) > 1)
 
-        # For each talk by the same speaker it can only be active in at most one
-        # talk slot at the same time.
-        for conflicts in talks_by_speaker.values():
-            if len(conflicts) > 1:
+    def _feasible_vars(self, venues, talks):
+        """Enumerate the feasible (slot, talk, venue) start triples and assign
+        each one a column index.
+
+        A start is feasible if the venue is permitted and every slot the talk
+        would occupy is both available and permitted for that talk."""
+        var_keys = []
+        var_idx = {}
+        slots = sorted(self.slots_available)
+
+        for talk in talks:
+            permissions = self.talk_permissions[talk.id]
+            for venue in sorted(set(permissions["venues"]) & set(venues)):
+                for slot in slots:
+                    if self.window_fits(slot, talk.id):
+                        var_idx[(slot, talk.id, venue)] = len(var_keys)
+                        var_keys.append((slot, talk.id, venue))
+
+        return var_keys, var_idx
+
+    def _build_matrix(self, venues, talks: Iterable[Talk], old_talks):
+        """Assemble the scheduling MIP as sparse matrices.
+
+        Returns (c, A_eq, b_eq, A_ub, b_ub, var_keys) where c is the
+        maximisation objective and var_keys maps column -> (slot, talk, venue)
+        start triple. Equivalent to the PuLP model built by get_problem, but
+        with the "active" auxiliaries folded directly into the rows."""
+        self.talks_by_id = {talk.id: talk for talk in talks}
+        self._usable_masks = {}
+        var_keys, var_idx = self._feasible_vars(venues, talks)
+        self._check_placeable(talks, {talk_id for _, talk_id, _ in var_keys})
+        n = len(var_keys)
+
+        # Objective weight for a talk being active in a given (slot, venue)
+        # cell; a start variable collects the weight of every cell it covers.
+        cell_weight: dict[tuple[int, int, int], int] = defaultdict(int)
+        for talk in talks:
+            for venue in talk.preferred_venues:
+                # Maximise the number of things in their preferred venues (for
+                # putting big talks on big stages)
                 for slot in self.slots_available:
-                    self.problem.addConstraint(
-                        pulp.lpSum(
-                            self.active(slot, talk_id, venue)
-                            for talk_id in conflicts
-                            for venue in venues
-                        )
-                        <= 1
+                    cell_weight[(slot, talk.id, venue)] += 5
+            for slot in talk.preferred_slots:
+                # Try and keep everything inside its preferred time period
+                # (for packing things earlier in the day)
+                for venue in venues:
+                    cell_weight[(slot, talk.id, venue)] += 10
+
+        for (slot, talk_id, venue) in old_talks:
+            duration = self.talks_by_id[talk_id].duration
+            # We'd like talks with a slot & venue to try and stay there if they can
+            for s in range(slot, slot + duration):
+                cell_weight[(s, talk_id, venue)] += 10
+            for v in self.talk_permissions[talk_id]["venues"]:
+                # And we'd prefer to just move stage rather than slot
+                for s in range(slot, slot + duration):
+                    cell_weight[(s, talk_id, v)] += 5
+                # But if they have to move slot, 60mins either way is ok
+                for s in range(slot - 6, slot + duration + 6):
+                    cell_weight[(s, talk_id, v)] += 1
+
+        c = np.zeros(n)
+        for (slot, talk_id, venue), col in var_idx.items():
+            duration = self.talks_by_id[talk_id].duration
+            c[col] = sum(
+                cell_weight.get((slot + offset, talk_id, venue), 0)
+                for offset in range(duration)
+            )
+
+        rows: list[int] = []
+        cols: list[int] = []
+
+        # Every talk begins exactly once
+        eq_row_of_talk = {talk.id: row for row, talk in enumerate(talks)}
+        for (slot, talk_id, venue), col in var_idx.items():
+            rows.append(eq_row_of_talk[talk_id])
+            cols.append(col)
+        A_eq = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(eq_row_of_talk), n)
+        )
+
+        # At most one talk may be active in a given venue and slot, and talks
+        # by the same speaker can't be active at the same time. A start
+        # variable contributes to the row of every cell the talk would cover.
+        conflict_of_talk: dict[int, list[int]] = defaultdict(list)
+        for group, conflicts in enumerate(self.conflict_groups(talks)):
+            for talk_id in conflicts:
+                conflict_of_talk[talk_id].append(group)
+
+        ub_entries: dict[tuple, list[int]] = defaultdict(list)
+        for (slot, talk_id, venue), col in var_idx.items():
+            for s in range(slot, slot + self.talks_by_id[talk_id].duration):
+                ub_entries[("venue", venue, s)].append(col)
+                for group in conflict_of_talk[talk_id]:
+                    ub_entries[("speaker", group, s)].append(col)
+
+        rows = []
+        cols = []
+        data = []
+        b_ub = []
+        for entry_cols in ub_entries.values():
+            # A cell only one start variable covers gives x <= 1, which the
+            # variable bounds already imply — don't post the row.
+            if len(entry_cols) < 2:
+                continue
+            row = len(b_ub)
+            b_ub.append(1)
+            for col in entry_cols:
+                rows.append(row)
+                cols.append(col)
+                data.append(1)
+
+        # Symmetry-breaking cuts: interchangeable venues must carry
+        # non-increasing total scheduled time, so CBC/HiGHS don't branch on
+        # permutations of the same schedule. Skipped when an old schedule
+        # anchors talks to venues.
+        if not old_talks:
+            vars_by_venue = defaultdict(list)
+            for (slot, talk_id, venue), col in var_idx.items():
+                vars_by_venue[venue].append((col, self.talks_by_id[talk_id].duration))
+            for group in self.interchangeable_venue_groups(venues, talks):
+                for v1, v2 in zip(group, group[1:]):
+                    row = len(b_ub)
+                    b_ub.append(0)
+                    for col, duration in vars_by_venue[v2]:
+                        rows.append(row)
+                        cols.append(col)
+                        data.append(duration)
+                    for col, duration in vars_by_venue[v1]:
+                        rows.append(row)
+                        cols.append(col)
+                        data.append(-duration)
+
+            # Indistinguishable talks by the same speaker must run in id
+            # order: sum(slot * start) is the talk's start slot, so
+            # start(t1) - start(t2) <= 0.
+            start_terms = defaultdict(list)
+            for (slot, talk_id, venue), col in var_idx.items():
+                start_terms[talk_id].append((col, slot))
+            for chain in self.identical_talk_chains(talks):
+                for t1, t2 in zip(chain, chain[1:]):
+                    row = len(b_ub)
+                    b_ub.append(0)
+                    for col, slot in start_terms[t1]:
+                        rows.append(row)
+                        cols.append(col)
+                        data.append(slot)
+                    for col, slot in start_terms[t2]:
+                        rows.append(row)
+                        cols.append(col)
+                        data.append(-slot)
+
+        A_ub = sparse.csr_matrix((data, (rows, cols)), shape=(len(b_ub), n))
+
+        b_eq = np.ones(A_eq.shape[0])
+        b_ub = np.array(b_ub, dtype=float)
+        return c, A_eq, b_eq, A_ub, b_ub, var_keys
+
+    def _model_key(self, venues, talks: Iterable[Talk], old_talks) -> str:
+        """Hash of everything _build_matrix depends on."""
+        dump = json.dumps(
+            {
+                "venues": sorted(venues),
+                "slots": sorted(self.slots_available),
+                "old_talks": sorted(old_talks),
+                "talks": [
+                    [
+                        list(talk),
+                        sorted(self.talk_permissions[talk.id]["slots"]),
+                        sorted(self.talk_permissions[talk.id]["venues"]),
+                    ]
+                    for talk in sorted(talks)
+                ],
+            },
+            default=list,
+        )
+        return hashlib.blake2b(dump.encode()).hexdigest()
+
+    def _cached_matrix(self, venues, talks: Iterable[Talk], old_talks):
+        """Return the matrices from _build_matrix, re-using a previous build
+        of the identical model where possible."""
+        key = self._model_key(venues, talks, old_talks)
+
+        matrices = self._model_cache.get(key)
+        if matrices is not None:
+            self.log.info("Re-using cached problem matrix")
+            return matrices
+
+        cache_file = None
+        if self.cache_dir is not None:
+            cache_file = os.path.join(self.cache_dir, key + ".pkl")
+            try:
+                with open(cache_file, "rb") as f:
+                    matrices = pickle.load(f)
+                self.log.info("Loaded cached problem matrix from %s", cache_file)
+                self._model_cache[key] = matrices
+                return matrices
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+
+        matrices = self._build_matrix(venues, talks, old_talks)
+        self._model_cache[key] = matrices
+
+        if cache_file is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_file, "wb") as f:
+                pickle.dump(matrices, f)
+
+        return matrices
+
+    def _solve_matrix(
+        self,
+        venues,
+        talks: Iterable[Talk],
+        old_talks,
+        presolve=None,
+        mip_rel_gap=None,
+        lazy_capacity=False,
+    ):
+        """Build and solve the sparse model with HiGHS via scipy.
+
+        With lazy_capacity the inequality rows start out omitted and only the
+        ones an intermediate solution actually violates are added before
+        re-solving. Most capacity rows are slack at the optimum, so large
+        models typically converge in a few rounds on a fraction of the rows."""
+        c, A_eq, b_eq, A_ub, b_ub, var_keys = self._cached_matrix(
+            venues, talks, old_talks
+        )
+        n = len(var_keys)
+        self.log.info("Problem matrix built (%s variables)", n)
+
+        options = {}
+        if presolve is not None:
+            options["presolve"] = presolve
+        if mip_rel_gap is not None:
+            options["mip_rel_gap"] = mip_rel_gap
+
+        include = np.ones(len(b_ub), dtype=bool)
+        if lazy_capacity:
+            include[:] = False
+
+        while True:
+            constraints = [scipy_optimize.LinearConstraint(A_eq, b_eq, b_eq)]
+            if include.any():
+                constraints.append(
+                    scipy_optimize.LinearConstraint(
+                        A_ub[include], -np.inf, b_ub[include]
                     )
-        return self.problem
+                )
+
+            result = scipy_optimize.milp(
+                c=-c,  # milp minimises
+                constraints=constraints,
+                integrality=np.ones(n),
+                bounds=scipy_optimize.Bounds(0, 1),
+                options=options,
+            )
 
-    def schedule_talks(self, talks: Iterable[Talk], old_talks=[]):
+            if not result.success:
+                raise Unsatisfiable()
+
+            if not lazy_capacity:
+                break
+            violated = (A_ub @ result.x > b_ub + 1e-6) & ~include
+            if not violated.any():
+                break
+            self.log.info(
+                "Adding %s violated constraints and re-solving", violated.sum()
+            )
+            include |= violated
+
+        return sorted(key for key, value in zip(var_keys, result.x) if value > 0.5)
+
+    def default_solver(
+        self, threads=None, presolve=None, mip_rel_gap=None, warm_start=False
+    ):
+        """The fastest PuLP solver installed: HiGHS if available, else CBC."""
+        if threads is None:
+            threads = os.cpu_count()
+        if hasattr(pulp, "HiGHS_CMD"):
+            # HiGHS has no presolve toggle in its pulp driver; don't drop the
+            # setting silently
+            if presolve is not None:
+                self.log.warning("HiGHS ignores the presolve setting")
+            solver = pulp.HiGHS_CMD(
+                threads=threads, msg=1, gapRel=mip_rel_gap, warmStart=warm_start
+            )
+            if solver.available():
+                return solver
+        if pulp.PULP_CBC_CMD(msg=0).available():
+            return pulp.PULP_CBC_CMD(
+                dual=0,
+                threads=threads,
+                msg=1,
+                presolve=presolve,
+                fracGap=mip_rel_gap,
+                mip_start=warm_start,
+            )
+        # We use CBC's simplex solver rather than dual, as it is faster and the
+        # accuracy difference is negligable for this problem
+        # We use COIN_CMD() over COIN() as it allows us to run in parallel mode
+        return pulp.COIN_CMD(
+            dual=0,
+            threads=threads,
+            msg=1,
+            presolve=presolve,
+            fracGap=mip_rel_gap,
+            mip_start=warm_start,
+        )
+
+    def _set_initial_values(self, old_talks):
+        """Seed CBC with the previous schedule as an incumbent solution.
+
+        The objective already rewards keeping talks where they were, so the
+        old schedule is usually near-optimal and lets branch-and-bound prune
+        most of the tree. Variables left unset are treated as 0."""
+        for slot, talk_id, venue in old_talks:
+            var = self.start_var(slot, talk_id, venue)
+            if not isinstance(var, int):
+                var.setInitialValue(1)
+
+    def schedule_talks(
+        self,
+        talks: Iterable[Talk],
+        old_talks=[],
+        solver=None,
+        threads=None,
+        presolve=None,
+        mip_rel_gap=None,
+        lazy_capacity=False,
+    ):
         start = time.time()
 
         self.log.info("Generating schedule problem...")
 
         venues = {v for talk in talks for v in talk.venues}
+
+        # Small or heavily-constrained schedules are often fully determined
+        # by propagation alone; skip the solver entirely when they are
+        self.talks_by_id = {talk.id: talk for talk in talks}
+        self._usable_masks = {}
+        forced = self._forced_schedule(venues, talks)
+        if forced is not None:
+            self.log.info(
+                "Schedule fully determined without solving in %.2f seconds.",
+                time.time() - start,
+            )
+            return forced
+
+        if solver is None:
+            solver = self.solver
+
+        # HiGHS through scipy is the fastest route when it's installed; an
+        # explicitly passed PuLP solver forces the PuLP model instead.
+        if solver is None and HAVE_MILP:
+            solved = self._solve_matrix(
+                venues,
+                talks,
+                old_talks,
+                presolve=presolve,
+                mip_rel_gap=mip_rel_gap,
+                lazy_capacity=lazy_capacity,
+            )
+            self.log.info("Problem solved in %.2f seconds.", time.time() - start)
+            return solved
+
         problem = self.get_problem(venues, talks, old_talks)
 
+        warm_start = bool(old_talks)
+        if warm_start:
+            self._set_initial_values(old_talks)
+
         self.log.info(
             "Problem generated (%s variables) in %.2f seconds, attempting to solve...",
             len(self.var_cache),
@@ -178,10 +834,14 @@ class SlotMachine(object):
         )
 
         solve_start = time.time()
-        # We use CBC's simplex solver rather than dual, as it is faster and the
-        # accuracy difference is negligable for this problem
-        # We use COIN_CMD() over COIN() as it allows us to run in parallel mode
-        problem.solve(pulp.COIN_CMD(dual=0, threads=2, msg=1))
+        if solver is None:
+            solver = self.default_solver(
+                threads=threads,
+                presolve=presolve,
+                mip_rel_gap=mip_rel_gap,
+                warm_start=warm_start,
+            )
+        problem.solve(solver)
 
         if pulp.LpStatus[self.problem.status] != "Optimal":
             raise Unsatisfiable()
@@ -192,21 +852,35 @@ class SlotMachine(object):
             time.time() - start,
         )
 
-        return [
-            (slot, talk.id, venue)
-            for slot in self.slots_available
-            for talk in talks
-            for venue in venues
-            if pulp.value(self.start_var(slot, talk.id, venue))
-        ]
+        # One pass over the variables we created, rather than re-walking the
+        # whole slot x talk x venue product through pulp.value()
+        return sorted(
+            key
+            for key, var in self.var_cache.items()
+            if not isinstance(var, int)
+            and var.varValue is not None
+            and var.varValue > 0.5
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def parse_time(value: str) -> datetime:
+        """Parse a timestamp, taking the fast path for ISO-8601 (which is
+        what schedules normally contain) and falling back to dateutil's
+        general parser for anything else. Repeated timestamps are cached."""
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return parser.parse(value)
 
     @classmethod
     def num_slots(self, start_time, end_time):
-        return int((end_time - start_time).total_seconds() / 60 / 10)
+        return int((end_time - start_time).total_seconds()) // 600
 
     @classmethod
+    @lru_cache(maxsize=None)
     def calculate_slots(self, event_start, range_start, range_end, spacing_slots=1):
-        slot_start = int((range_start - event_start).total_seconds() / 60 / 10)
+        slot_start = int((range_start - event_start).total_seconds()) // 600
         # We add the number of slots that must be between events to the end to
         # allow events to finish in the last period of the schedule
         return range(
@@ -218,7 +892,7 @@ class SlotMachine(object):
         return event_start + relativedelta.relativedelta(minutes=slots * 10)
 
     def calc_slot(self, event_start: datetime, time: datetime):
-        return int((time - event_start).total_seconds() / 60 / 10)
+        return int((time - event_start).total_seconds()) // 600
 
     def schedule(self, schedule: dict, spacing_slots: int = 1) -> list[dict]:
         talks = []
@@ -226,7 +900,9 @@ class SlotMachine(object):
         old_slots = []
 
         event_start = min(
-            parser.parse(r["start"]) for event in schedule for r in event["time_ranges"]
+            self.parse_time(r["start"])
+            for event in schedule
+            for r in event["time_ranges"]
         )
 
         for event in schedule:
@@ -238,8 +914,8 @@ class SlotMachine(object):
             for trange in event["time_ranges"]:
                 event_slots = SlotMachine.calculate_slots(
                     event_start,
-                    parser.parse(trange["start"]),
-                    parser.parse(trange["end"]),
+                    self.parse_time(trange["start"]),
+                    self.parse_time(trange["end"]),
                     spacing_slots,
                 )
                 slots.extend(event_slots)
@@ -247,17 +923,19 @@ class SlotMachine(object):
             for trange in event.get("preferred_time_ranges", []):
                 event_slots = SlotMachine.calculate_slots(
                     event_start,
-                    parser.parse(trange["start"]),
-                    parser.parse(trange["end"]),
+                    self.parse_time(trange["start"]),
+                    self.parse_time(trange["end"]),
                     spacing_slots,
                 )
                 preferred_slots.extend(event_slots)
 
-            self.slots_available = self.slots_available.union(set(slots))
+            # In-place update, not union(), which copies the whole set per event
+            self.slots_available.update(slots)
 
+            # frozensets: these get membership-tested per grid cell
             self.talk_permissions[event["id"]] = {
-                "slots": slots,
-                "venues": event["valid_venues"],
+                "slots": frozenset(slots),
+                "venues": frozenset(event["valid_venues"]),
             }
 
             talks.append(
@@ -267,7 +945,7 @@ class SlotMachine(object):
                     speakers=event["speakers"],
                     # We add the number of spacing slots that must be between
                     # events to the duration
-                    duration=int(event["duration"] / 10) + spacing_slots,
+                    duration=int(event["duration"]) // 10 + spacing_slots,
                     preferred_venues=event.get("preferred_venues", []),
                     preferred_slots=preferred_slots,
                 )
@@ -276,7 +954,7 @@ class SlotMachine(object):
             if "time" in event and "venue" in event:
                 old_slots.append(
                     (
-                        self.calc_slot(event_start, parser.parse(event["time"])),
+                        self.calc_slot(event_start, self.parse_time(event["time"])),
                         event["id"],
                         event["venue"],
                     )
@@ -291,9 +969,22 @@ class SlotMachine(object):
         return list(talk_data.values())
 
     def schedule_from_file(self, infile, outfile):
-        schedule = json.load(open(infile))
+        if orjson is not None:
+            with open(infile, "rb") as f:
+                schedule = orjson.loads(f.read())
+        else:
+            with open(infile) as f:
+                schedule = json.load(f)
 
         result = self.schedule(schedule)
 
-        with open(outfile, "w") as f:
-            json.dump(result, f, sort_keys=True, indent=4, separators=(",", ": "))
+        if orjson is not None:
+            with open(outfile, "wb") as f:
+                f.write(
+                    orjson.dumps(
+                        result, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+                    )
+                )
+        else:
+            with open(outfile, "w") as f:
+                json.dump(result, f, sort_keys=True, indent=4, separators=(",", ": "))
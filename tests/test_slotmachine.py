@@ -1,6 +1,7 @@
 import unittest
 from collections import defaultdict
 from dateutil import parser
+import slotmachine
 from slotmachine import SlotMachine, Unsatisfiable
 
 Talk = SlotMachine.Talk
@@ -11,6 +12,15 @@ def unzip(l):
 
 
 class UtilTestCase(unittest.TestCase):
+    def test_parse_time(self):
+        # The fromisoformat fast path and the dateutil fallback should agree
+        assert SlotMachine.parse_time("2016-08-05 13:00") == parser.parse(
+            "2016-08-05 13:00"
+        )
+        assert SlotMachine.parse_time("5 Aug 2016 13:00") == parser.parse(
+            "5 Aug 2016 13:00"
+        )
+
     def test_calculate_slots(self):
         event_start = parser.parse("2016-08-05 13:00")
         slots_minimal = SlotMachine.calculate_slots(
@@ -113,6 +123,191 @@ class ScheduleTalksTestCase(unittest.TestCase):
         )
         self.assertEqual(solved, solved_second)
 
+    @unittest.skipUnless(slotmachine.HAVE_MILP, "needs scipy")
+    def test_model_cache(self):
+        talk_defs = [
+            Talk(id=1, duration=3 + 1, venues=[101], speakers=["Speaker 1"]),
+            Talk(id=2, duration=3 + 1, venues=[101], speakers=["Speaker 2"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 15:00"),
+        )
+        sm = SlotMachine()
+        sm.talk_permissions = {
+            1: {"slots": avail_slots[:], "venues": [101]},
+            2: {"slots": avail_slots[:], "venues": [101]},
+        }
+        sm.slots_available = avail_slots
+
+        first = sm.schedule_talks(talk_defs)
+        second = sm.schedule_talks(talk_defs)
+
+        # The second identical solve should re-use the built matrices
+        self.assertEqual(first, second)
+        self.assertEqual(len(sm._model_cache), 1)
+
+    def test_interchangeable_venues(self):
+        # Venues 101 and 102 are indistinguishable here; the symmetry cuts
+        # shouldn't stop a valid schedule being found
+        talk_defs = [
+            Talk(id=1, duration=3 + 1, venues=[101, 102], speakers=["Speaker 1"]),
+            Talk(id=2, duration=3 + 1, venues=[101, 102], speakers=["Speaker 2"]),
+            Talk(id=3, duration=3 + 1, venues=[101, 102], speakers=["Speaker 3"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 15:00"),
+        )
+        talk_permissions = {
+            1: {"slots": avail_slots[:], "venues": [101, 102]},
+            2: {"slots": avail_slots[:], "venues": [101, 102]},
+            3: {"slots": avail_slots[:], "venues": [101, 102]},
+        }
+
+        sm = SlotMachine()
+        sm.talk_permissions = talk_permissions
+        self.assertEqual(
+            sm.interchangeable_venue_groups([101, 102], talk_defs), [[101, 102]]
+        )
+
+        self.schedule_and_basic_asserts(talk_defs, talk_permissions, avail_slots)
+
+    @unittest.skipUnless(slotmachine.HAVE_MILP, "needs scipy")
+    def test_lazy_capacity(self):
+        # Lazily-generated capacity constraints must converge to a schedule
+        # with no overlaps
+        talk_defs = [
+            Talk(id=1, duration=3 + 1, venues=[101], speakers=["Speaker 1"]),
+            Talk(id=2, duration=3 + 1, venues=[101], speakers=["Speaker 2"]),
+            Talk(id=3, duration=3 + 1, venues=[101], speakers=["Speaker 3"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 15:00"),
+        )
+        sm = SlotMachine()
+        sm.talk_permissions = {
+            t.id: {"slots": avail_slots[:], "venues": [101]} for t in talk_defs
+        }
+        sm.slots_available = avail_slots
+
+        solved = sm.schedule_talks(talk_defs, lazy_capacity=True)
+
+        self.assertEqual(sorted(t for s, t, v in solved), [1, 2, 3])
+        used = set()
+        for slot, talk_id, venue in solved:
+            for i in range(4):
+                self.assertNotIn((venue, slot + i), used)
+                used.add((venue, slot + i))
+
+    def test_identical_talks_ordered(self):
+        # Talks 1 and 2 are interchangeable talks by the same speaker; the
+        # ordering cuts must leave a valid schedule with talk 1 first
+        talk_defs = [
+            Talk(id=1, duration=3 + 1, venues=[101], speakers=["Speaker 1"]),
+            Talk(id=2, duration=3 + 1, venues=[101], speakers=["Speaker 1"]),
+            Talk(id=3, duration=3 + 1, venues=[101], speakers=["Speaker 2"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 15:00"),
+        )
+        talk_permissions = {
+            t.id: {"slots": avail_slots[:], "venues": [101]} for t in talk_defs
+        }
+
+        sm = SlotMachine()
+        sm.talk_permissions = talk_permissions
+        self.assertEqual(sm.identical_talk_chains(talk_defs), [[1, 2]])
+
+        solved = self.schedule_and_basic_asserts(
+            talk_defs, talk_permissions, avail_slots
+        )
+        talks_slots = dict((t, s) for s, t, v in solved)
+        self.assertLess(talks_slots[1], talks_slots[2])
+
+    def test_stale_old_slot(self):
+        # An old schedule can place a talk before the current time ranges;
+        # warm-starting from it must treat the slot as infeasible, not crash
+        talk_defs = [Talk(id=1, duration=3 + 1, venues=[101], speakers=["Speaker 1"])]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 14:00"),
+        )
+        talk_permissions = {1: {"slots": avail_slots[:], "venues": [101]}}
+
+        sm = SlotMachine()
+        sm.talk_permissions = talk_permissions
+        sm.slots_available = avail_slots
+        sm.talks_by_id = {t.id: t for t in talk_defs}
+
+        self.assertFalse(sm.window_fits(-1, 1))
+        self.assertEqual(sm.start_var(-1, 1, 101), 0)
+
+        solved = sm.schedule_talks(talk_defs, old_talks=[(-1, 1, 101)])
+        self.assertEqual([t for s, t, v in solved], [1])
+
+    def test_unequal_speaker_sets_not_chained(self):
+        # Talks 1 and 2 match on duration and permissions but talk 1 has an
+        # extra speaker, so they mustn't be ordered as interchangeable: talk 3
+        # pins Speaker B early, which forces talk 1 to run after talk 2
+        talk_defs = [
+            Talk(id=1, duration=4, venues=[101], speakers=["Speaker A", "Speaker B"]),
+            Talk(id=2, duration=4, venues=[101], speakers=["Speaker A"]),
+            Talk(id=3, duration=4, venues=[102], speakers=["Speaker B"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 14:30"),
+        )
+        talk_permissions = {
+            1: {"slots": avail_slots[:], "venues": [101]},
+            2: {"slots": avail_slots[:], "venues": [101]},
+            3: {"slots": [0, 1, 2, 3], "venues": [102]},
+        }
+
+        sm = SlotMachine()
+        sm.talk_permissions = talk_permissions
+        self.assertEqual(sm.identical_talk_chains(talk_defs), [])
+
+        solved = self.schedule_and_basic_asserts(
+            talk_defs, talk_permissions, avail_slots
+        )
+        talks_slots = dict((t, s) for s, t, v in solved)
+        self.assertLess(talks_slots[2], talks_slots[1])
+
+    def test_forced_schedule(self):
+        # Talk 1 can only start at 0; fixing it leaves talk 2 a single start,
+        # so the schedule is determined without running a solver at all
+        talk_defs = [
+            Talk(id=1, duration=4, venues=[101], speakers=["Speaker 1"]),
+            Talk(id=2, duration=3, venues=[101], speakers=["Speaker 2"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 14:00"),
+        )
+        talk_permissions = {
+            1: {"slots": [0, 1, 2, 3], "venues": [101]},
+            2: {"slots": avail_slots[:], "venues": [101]},
+        }
+
+        sm = SlotMachine()
+        sm.talk_permissions = talk_permissions
+        sm.slots_available = avail_slots
+
+        # A bogus solver object proves the solver is never invoked
+        solved = sm.schedule_talks(talk_defs, solver=object())
+        self.assertEqual(solved, [(0, 1, 101), (4, 2, 101)])
+
     def test_too_many_talks(self):
         # This should just exceed the number of available slots (12 + 1)
         talk_defs = [
@@ -158,6 +353,25 @@ class ScheduleTalksTestCase(unittest.TestCase):
         talk_venues = dict([(t, v) for s, t, v in solved])
         self.assertEqual(talk_venues[3], 102)
 
+    def test_talk_cannot_fit(self):
+        # Talk 2 is longer than the whole afternoon, which should be caught
+        # before the solver even runs
+        talk_defs = [
+            Talk(id=1, duration=3 + 1, venues=[101], speakers=["Speaker 1"]),
+            Talk(id=2, duration=20 + 1, venues=[101], speakers=["Speaker 2"]),
+        ]
+        avail_slots = SlotMachine.calculate_slots(
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 13:00"),
+            parser.parse("2016-08-06 15:00"),
+        )
+        talk_permissions = {
+            1: {"slots": avail_slots[:], "venues": [101]},
+            2: {"slots": avail_slots[:], "venues": [101]},
+        }
+
+        self.schedule_and_assert_fails(talk_defs, talk_permissions, avail_slots)
+
     def test_venue_too_full(self):
         # Talks 1 and 3 won't fit into 101 together, and 3 and 4 won't fit in 102 together
         talk_defs = [